@@ -0,0 +1,40 @@
+"""Add todo_rankings table
+
+Revision ID: 7c1d2e9f4a10
+Revises: 0a22587af98b
+Create Date: 2026-10-19 09:12:04.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1d2e9f4a10'
+down_revision: Union[str, Sequence[str], None] = '0a22587af98b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('todo_rankings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=True),
+    sa.Column('todo_id', sa.Integer(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('content_hash', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_todo_rankings_id'), 'todo_rankings', ['id'], unique=False)
+    op.create_index(op.f('ix_todo_rankings_owner_id'), 'todo_rankings', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_todo_rankings_owner_id'), table_name='todo_rankings')
+    op.drop_index(op.f('ix_todo_rankings_id'), table_name='todo_rankings')
+    op.drop_table('todo_rankings')
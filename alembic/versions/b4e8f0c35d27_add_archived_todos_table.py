@@ -0,0 +1,43 @@
+"""Add archived_todos table
+
+Revision ID: b4e8f0c35d27
+Revises: 7c1d2e9f4a10
+Create Date: 2026-10-19 14:03:41.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f0c35d27'
+down_revision: Union[str, Sequence[str], None] = '7c1d2e9f4a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archived_todos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('todo_id', sa.Integer(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('priority', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_todos_id'), 'archived_todos', ['id'], unique=False)
+    op.create_index(op.f('ix_archived_todos_owner_id'), 'archived_todos', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archived_todos_owner_id'), table_name='archived_todos')
+    op.drop_index(op.f('ix_archived_todos_id'), table_name='archived_todos')
+    op.drop_table('archived_todos')
@@ -0,0 +1,45 @@
+"""Use AUTOINCREMENT ids for todos
+
+Revision ID: d91a6c07e2f3
+Revises: b4e8f0c35d27
+Create Date: 2026-10-19 16:40:12.873120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91a6c07e2f3'
+down_revision: Union[str, Sequence[str], None] = 'b4e8f0c35d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite can only add AUTOINCREMENT by rebuilding the table.
+    with op.batch_alter_table('todos', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+    # The rebuilt sequence starts after max(todos.id), but ids already moved to
+    # archived_todos must not be handed out again either.
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        last_id = bind.execute(sa.text(
+            "SELECT MAX(id) FROM ("
+            "SELECT MAX(id) AS id FROM todos UNION ALL SELECT MAX(todo_id) FROM archived_todos)"
+        )).scalar() or 0
+        bind.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = 'todos'"))
+        bind.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('todos', :seq)"),
+                     {"seq": last_id})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('todos', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
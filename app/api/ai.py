@@ -2,9 +2,9 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
 from .. import models, schemas
-from ..services import ai_service
+from ..services import ai_service, ranking_service
 from . import dependencies
 from datetime import datetime
 
@@ -48,29 +48,13 @@ def get_subtask_suggestions(
 def re_prioritize_all_tasks(
         db: Session = Depends(dependencies.get_db),
         current_user: models.User = Depends(dependencies.get_current_user),
+        mode: Literal["local", "hybrid", "llm"] = "llm",
 ):
     db_todos = current_user.todos
 
     if not db_todos:
         return []
 
-    tasks_for_ai = [schemas.TodoResponse.model_validate(todo) for todo in db_todos]
-    re_prioritized_tasks_data = ai_service.get_priority_tasks(task_list=tasks_for_ai)
-
-    if not re_prioritized_tasks_data:
-        raise HTTPException(status_code=400, detail="AI failed to re-prioritize tasks")
-
-    db_todo_map = {db_todo.id: db_todo for db_todo in db_todos}
-
-    for re_prioritized_task in re_prioritized_tasks_data:
-        task_id = re_prioritized_task.get('id')
-        new_priority = re_prioritized_task.get('priority')
-
-        db_todo = db_todo_map.get(task_id)
-
-        if db_todo and new_priority is not None:
-            db_todo.priority = new_priority
-
-    db.commit()
-
-    return db_todos
+    if mode == "llm":
+        return ranking_service.re_prioritize(db, current_user)
+    return ranking_service.re_prioritize_local(db, current_user, hybrid=mode == "hybrid")
@@ -28,9 +28,20 @@ def create_todo(
 
 @router.get("/", response_model=List[schemas.TodoResponse])
 def get_all_todos(
+        include_archived: bool = False,
+        db: Session = Depends(dependencies.get_db),
         current_user: models.User = Depends(dependencies.get_current_user)
 ):
-    return current_user.todos or []
+    if not include_archived:
+        return current_user.todos or []
+
+    archived = db.query(models.ArchivedTodo).filter(models.ArchivedTodo.owner_id == current_user.id).all()
+    return list(current_user.todos) + [
+        schemas.TodoResponse(id=todo.todo_id, title=todo.title, description=todo.description,
+                             priority=todo.priority, created_at=todo.created_at, completed=True,
+                             owner_id=todo.owner_id)
+        for todo in archived
+    ]
 
 
 # In app/api/todos.py
@@ -9,5 +9,13 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+    # Completed todos older than this many days are moved to archived_todos.
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    # How often the in-process archival job runs; 0 disables it (e.g. when run from cron).
+    ARCHIVE_INTERVAL_HOURS: float = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "0"))
+    # VACUUM only after a run that archived at least this many rows; ANALYZE runs after any.
+    ARCHIVE_VACUUM_MIN_ROWS: int = int(os.getenv("ARCHIVE_VACUUM_MIN_ROWS", "1000"))
 
-settings = Settings()
\ No newline at end of file
+
+settings = Settings()
@@ -1,12 +1,36 @@
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api import users, todos, ai
 from . import models
 from .database import engine
+from .services import archive_service, token_budget
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+# uvicorn only configures its own loggers, so give the app's a handler and level
+# or the per-request AI token reports never show up.
+app_logger = logging.getLogger("app")
+if not app_logger.handlers:
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    app_logger.addHandler(log_handler)
+app_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the tokenizer now so no request has to wait for it.
+    token_budget.load_tokenizer()
+    stop_archival = archive_service.start_scheduler()
+    yield
+    if stop_archival:
+        stop_archival.set()
+
+
+app = FastAPI(lifespan=lifespan)
 # set this to your React dev origin(s)
 origins = [
     "http://localhost:3000",
@@ -2,3 +2,5 @@
 from ..database import Base
 from .todo_model import Todo
 from .user_model import User
+from .ranking_model import TodoRanking
+from .archived_todo_model import ArchivedTodo
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
+from ..database import Base
+
+
+class ArchivedTodo(Base):
+    """
+    Cold storage for completed todos moved out of the hot todos table.
+    Everything archived is completed, so that column is dropped.
+    """
+    __tablename__ = "archived_todos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    todo_id = Column(Integer)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    title = Column(String)
+    description = Column(String)
+    priority = Column(Integer)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime)
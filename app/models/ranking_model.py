@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, ForeignKey
+from ..database import Base
+
+
+class TodoRanking(Base):
+    """
+    One row per active todo in the last AI ranking of a user, so the next
+    re-prioritization only has to place the todos that changed since.
+    """
+    __tablename__ = "todo_rankings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    todo_id = Column(Integer)
+    position = Column(Integer)
+    content_hash = Column(String)
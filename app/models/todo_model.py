@@ -5,6 +5,8 @@ from ..database import Base
 
 class Todo(Base):
     __tablename__ = "todos"
+    # Never reuse ids: archived_todos keeps the original todo id.
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
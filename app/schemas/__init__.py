@@ -1,3 +1,3 @@
 from .todo_schema import TodoResponse, TodoCreate, TodoUpdate
 from .user_schema import UserResponse, UserCreate
-from .ai_schema import TaskForSuggestions, SubtaskSuggestionsResponse
+from .ai_schema import TaskForSuggestions, SubtaskSuggestionsResponse, TaskPrioritiesWrapper
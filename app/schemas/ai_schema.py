@@ -1,6 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import List
-from datetime import  datetime
 
 
 class TaskForSuggestions(BaseModel):
@@ -10,19 +9,22 @@ class TaskForSuggestions(BaseModel):
 class SubtaskItem(BaseModel):
     title: str
     description: str
+    priority: int
 
 
 class SubtaskSuggestionsResponse(BaseModel):
     subtasks: list[SubtaskItem]
 
 
-class TaskItem(BaseModel):
-    title: str
-    description: str
+class TaskPriorityItem(BaseModel):
+    id: int
     priority: int
-    created_at: datetime
-    completed: bool
 
 
-class TasksWrapper(BaseModel):
-    tasks: List[TaskItem]
+class TaskPrioritiesWrapper(BaseModel):
+    tasks: List[TaskPriorityItem]
+
+
+# Built once at import so validating every model response skips schema compilation.
+subtask_list_adapter = TypeAdapter(list[SubtaskItem])
+task_priority_list_adapter = TypeAdapter(list[TaskPriorityItem])
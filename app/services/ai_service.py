@@ -1,9 +1,17 @@
 import json
+import logging
 import os
 from openai import OpenAI
 from fastapi import HTTPException
 from fastapi.encoders import jsonable_encoder
 from datetime import datetime
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter
+from ..schemas import ai_schema
+from . import token_budget
+from .llm_json import extract_json_array
+
+logger = logging.getLogger(__name__)
 
 # Load environment variable
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -13,55 +21,177 @@ client = OpenAI(api_key=OPENAI_API_KEY)
 
 MODEL = "gpt-4o-mini"
 
+# Ask the API for schema-constrained output. Set AI_STRUCTURED_OUTPUT=0 for
+# providers or models that don't support response_format json_schema.
+STRUCTURED_OUTPUT = os.getenv("AI_STRUCTURED_OUTPUT", "1") != "0"
 
-def get_subtasks(task_title: str):
+# Extra calls allowed to fix output that fails to parse or validate.
+MAX_REPAIR_ATTEMPTS = 1
+
+# Fewest subtasks accepted from the model; the prompt asks for 6–9.
+MIN_SUBTASKS = 6
+
+# Hard cap on prompt tokens per request; task payloads are compacted to fit.
+MAX_PROMPT_TOKENS = int(os.getenv("AI_MAX_PROMPT_TOKENS", "6000"))
+
+
+def _strict_schema(node):
     """
-    Generates subtasks for a given high-level task using OpenAI GPT-4o-mini.
+    Structured outputs in strict mode need additionalProperties: false on every object.
     """
+    if isinstance(node, dict):
+        node = {key: _strict_schema(value) for key, value in node.items()}
+        if node.get("type") == "object":
+            node["additionalProperties"] = False
+        return node
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    return node
 
-    prompt = f"""
-    You are MindfulCoach, a calm but decisive planning expert. Internally consider energy, dependencies, and “minimum next steps,” but OUTPUT ONLY JSON.
-
-    GOAL
-    Turn the user's high-level task into 6–9 concrete subtasks that a real person can execute today.
-
-    PLANNING HEURISTICS (think silently; do NOT explain in output)
-    • Start with a quick setup/clarify step if needed, then sequence from easiest win → hardest focus → admin/wrap-up.
-    • Make each subtask independent, small (<60 min), and start with a strong verb.
-    • Respect natural flow: plan → prep → do → review. Batch similar actions.
-    • Prefer momentum over perfection; avoid duplicate or overlapping steps.
-
-    OUTPUT RULES (must follow exactly)
-    1) Return ONLY a JSON array of objects (no markdown, no commentary).
-    2) Each object has EXACTLY these keys:
-       - "title"        : short, 3–6 words, action-verb first (e.g., “Draft outline V1”)
-       - "description"  : one sentence with specifics (what + how)
-       - "priority"     : integer rank starting at 1 (1 = highest), no ties, no gaps
-       - "created_at"   : ISO 8601 UTC timestamp like "2025-10-19T14:30:00Z"
-    3) Create 6–9 items. Keep titles unique. No numbering inside titles.
-    4) JSON must be valid and parseable without edits. No trailing commas.
-
-    USER TASK
-    {task_title}
+
+def _response_format(wrapper: type[BaseModel]) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": wrapper.__name__,
+            "strict": True,
+            "schema": _strict_schema(wrapper.model_json_schema()),
+        },
+    }
+
+
+SUBTASKS_RESPONSE_FORMAT = _response_format(ai_schema.SubtaskSuggestionsResponse)
+TASK_PRIORITIES_RESPONSE_FORMAT = _response_format(ai_schema.TaskPrioritiesWrapper)
+
+
+def _complete_json(label: str, messages: list[dict], temperature: float, response_format: dict,
+                   key: str, adapter: TypeAdapter, min_items: int = 1) -> list:
+    """
+    Runs the completion and returns the validated items. Fenced or wrapped
+    output is recovered where possible. Output that doesn't parse or validate,
+    was cut off, or has fewer than `min_items` items is treated as a failure:
+    the model is shown the error and asked to fix its own answer. If the last
+    attempt is still incomplete, the valid items it did return are used and the
+    caller deals with the missing ones.
     """
+    extra = {"response_format": response_format} if STRUCTURED_OUTPUT else {}
+    partial = []
 
-    try:
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
         response = client.chat.completions.create(
             model=MODEL,
+            messages=messages,
+            temperature=temperature,
+            **extra,
+        )
+        content = response.choices[0].message.content or ""
+
+        usage = response.usage
+        if usage is not None:
+            details = usage.prompt_tokens_details
+            logger.info("%s: %d prompt tokens (%d cached), %d completion tokens", label,
+                        usage.prompt_tokens, (details.cached_tokens or 0) if details else 0,
+                        usage.completion_tokens)
+
+        try:
+            items = adapter.validate_python(extract_json_array(content, key))
+            partial = items or partial
+            if response.choices[0].finish_reason == "length":
+                raise ValueError("the output was cut off before the JSON was complete")
+            if len(items) < min_items:
+                raise ValueError(f"expected at least {min_items} items, got {len(items)}")
+            return items
+        except ValueError as e:
+            # json.JSONDecodeError and pydantic's ValidationError are both ValueErrors.
+            error = e
+            messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": f"That output was invalid: {str(e)[:500]}\n"
+                                            f"Reply with the corrected JSON only."},
+            ]
+
+    if partial:
+        logger.warning("%s: using incomplete output after repair: %s", label, error)
+        return partial
+    raise error
+
+
+# The instruction blocks are kept byte-for-byte identical across calls and sent
+# first, with only the user's data after them. OpenAI only caches prompts of at
+# least 1024 tokens and these prefixes are around 400-500, so short requests are
+# never cached; the prefix only hits the cache once the whole prompt passes that.
+SUBTASKS_SYSTEM_PROMPT = """You are MindfulCoach, a calm but decisive planning expert. Internally consider energy, dependencies, and “minimum next steps,” but OUTPUT ONLY JSON.
+
+GOAL
+Turn the user's high-level task into 6–9 concrete subtasks that a real person can execute today.
+
+PLANNING HEURISTICS (think silently; do NOT explain in output)
+• Start with a quick setup/clarify step if needed, then sequence from easiest win → hardest focus → admin/wrap-up.
+• Make each subtask independent, small (<60 min), and start with a strong verb.
+• Respect natural flow: plan → prep → do → review. Batch similar actions.
+• Prefer momentum over perfection; avoid duplicate or overlapping steps.
+
+OUTPUT RULES (must follow exactly)
+1) Return ONLY a JSON object {"subtasks": [...]} (no markdown, no commentary).
+2) Each object in "subtasks" has EXACTLY these keys:
+   - "title"        : short, 3–6 words, action-verb first (e.g., “Draft outline V1”)
+   - "description"  : one sentence with specifics (what + how)
+   - "priority"     : integer rank starting at 1 (1 = highest), no ties, no gaps
+3) Create 6–9 items. Keep titles unique. No numbering inside titles.
+4) JSON must be valid and parseable without edits. No trailing commas.
+
+The user's message is the high-level task."""
+
+PRIORITY_SYSTEM_PROMPT = """You are MindfulCoach, an empathetic but structured scheduling expert.
+Your goal is to re-prioritize the user’s existing tasks so the day flows naturally, balancing energy, focus, and well-being.
+
+INPUT
+The user's message is a JSON array of tasks with short keys:
+"i" = id, "t" = title, "d" = description (may be truncated or missing), "p" = current priority,
+"a" = age in days, "c" = 1 if already completed.
+
+INTERNAL REASONING (do not include in output):
+• Group similar or dependent tasks together.
+• Place high-impact or time-sensitive tasks first.
+• Keep deep-focus work before admin or errands.
+• Schedule recovery or light tasks near the end.
+• Think like a human who wants momentum, not burnout.
+
+OUTPUT RULES (must follow exactly):
+1) Return ONLY a valid JSON object {"tasks": [{"id": <i>, "priority": <rank>}, ...]} (no markdown, no commentary).
+2) Include every given task exactly once — do not add or remove any.
+3) Assign "priority" values as integers starting at 1 (1 = highest), with no ties or gaps.
+4) Output must be valid JSON and parseable without modification."""
+
+
+@lru_cache(maxsize=None)
+def _prefix_tokens(prompt: str, response_format_json: str) -> int:
+    return token_budget.count_tokens(prompt) + token_budget.count_tokens(response_format_json)
+
+
+def get_subtasks(task_title: str):
+    """
+    Generates subtasks for a given high-level task using OpenAI GPT-4o-mini.
+    """
+    prefix_tokens = _prefix_tokens(SUBTASKS_SYSTEM_PROMPT, json.dumps(SUBTASKS_RESPONSE_FORMAT))
+    task_title = token_budget.truncate_to_tokens(task_title, MAX_PROMPT_TOKENS - prefix_tokens)
+
+    try:
+        items = _complete_json(
+            label="subtasks",
             messages=[
-                {"role": "system", "content": "You output only valid JSON."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": SUBTASKS_SYSTEM_PROMPT},
+                {"role": "user", "content": task_title}
             ],
             temperature=0.2,
+            response_format=SUBTASKS_RESPONSE_FORMAT,
+            key="subtasks",
+            adapter=ai_schema.subtask_list_adapter,
+            min_items=MIN_SUBTASKS,
         )
 
-        content = response.choices[0].message.content.strip()
-        subtasks = json.loads(content)
-
-        # ✅ Optional: ensure all have created_at if model missed it
-        for subtask in subtasks:
-            if "created_at" not in subtask:
-                subtask["created_at"] = datetime.utcnow().isoformat() + "Z"
+        created_at = datetime.utcnow().isoformat() + "Z"
+        subtasks = [{**item.model_dump(), "created_at": created_at} for item in items]
 
         return subtasks
 
@@ -69,47 +199,42 @@ def get_subtasks(task_title: str):
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
 
-def get_priority_tasks(task_list: list[dict]) -> list[dict]:
+def get_priority_tasks(task_list: list[dict], context_list: list[dict] = ()) -> list[dict]:
     """
     Re-prioritize a list of tasks based on context using GPT-4o-mini.
+    `context_list` tasks are ranked along with the rest but are the first to be
+    dropped when the prompt would exceed MAX_PROMPT_TOKENS.
+    Returns {"id", "priority"} pairs; dropped tasks are not in the result.
     """
+    prefix_tokens = _prefix_tokens(PRIORITY_SYSTEM_PROMPT, json.dumps(TASK_PRIORITIES_RESPONSE_FORMAT))
     tasks_payload = jsonable_encoder(task_list)
-    tasks_json = json.dumps(tasks_payload, ensure_ascii=False)
-
-    prompt = f"""
-    You are MindfulCoach, an empathetic but structured scheduling expert.
-    Your goal is to re-prioritize the user’s existing tasks so the day flows naturally, balancing energy, focus, and well-being.
-
-    INTERNAL REASONING (do not include in output):
-    • Group similar or dependent tasks together.
-    • Place high-impact or time-sensitive tasks first.
-    • Keep deep-focus work before admin or errands.
-    • Schedule recovery or light tasks near the end.
-    • Think like a human who wants momentum, not burnout.
-
-    OUTPUT RULES (must follow exactly):
-    1) Return ONLY a valid JSON array of objects (no markdown, no commentary).
-    2) Use the SAME objects given — do not add, remove, or rename anything.
-    3) Keep every field exactly the same EXCEPT "priority".
-    4) Reassign "priority" values as integers starting at 1 (1 = highest), with no ties or gaps.
-    5) Output must be valid JSON and parseable without modification.
-
-    Tasks to re-prioritize:
-    {tasks_json}
-    """
+    context_payload = jsonable_encoder(list(context_list))
+    tasks_json, included = token_budget.fit_tasks(tasks_payload, MAX_PROMPT_TOKENS - prefix_tokens,
+                                                  context=context_payload)
+
+    # The verbose size is estimated from its length so the list isn't tokenized twice.
+    compact_tokens = token_budget.count_tokens(tasks_json)
+    verbose_chars = len(json.dumps(tasks_payload + context_payload, ensure_ascii=False))
+    verbose_tokens = compact_tokens * verbose_chars // max(1, len(tasks_json))
+    logger.info("re-prioritize: %d/%d tasks in %d payload tokens "
+                "(estimated: ~%d as verbose JSON, ~%d saved)",
+                len(included), len(tasks_payload) + len(context_payload), compact_tokens, verbose_tokens,
+                verbose_tokens - compact_tokens)
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL,
+        items = _complete_json(
+            label="re-prioritize",
             messages=[
-                {"role": "system", "content": "You output only valid JSON."},
-                {"role": "user", "content": prompt},
+                {"role": "system", "content": PRIORITY_SYSTEM_PROMPT},
+                {"role": "user", "content": tasks_json},
             ],
             temperature=0,
+            response_format=TASK_PRIORITIES_RESPONSE_FORMAT,
+            key="tasks",
+            adapter=ai_schema.task_priority_list_adapter,
+            min_items=len(included),
         )
-
-        content = response.choices[0].message.content.strip()
-        updated_tasks = json.loads(content)
+        updated_tasks = [item.model_dump() for item in items]
 
         return updated_tasks
 
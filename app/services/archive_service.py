@@ -0,0 +1,111 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+
+def archive_completed_todos(db: Session, older_than_days: int | None = None,
+                            batch_size: int | None = None) -> int:
+    """
+    Moves completed todos created more than `older_than_days` ago into
+    archived_todos, committing one batch at a time so the todos table is never
+    locked for long. Returns the number of todos archived.
+    """
+    older_than_days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        batch = (
+            db.query(models.Todo)
+            .filter(models.Todo.completed.is_(True), models.Todo.created_at < cutoff)
+            .order_by(models.Todo.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+
+        archived_at = datetime.utcnow()
+        db.add_all([
+            models.ArchivedTodo(todo_id=todo.id, owner_id=todo.owner_id, title=todo.title,
+                                description=todo.description, priority=todo.priority,
+                                created_at=todo.created_at, archived_at=archived_at)
+            for todo in batch
+        ])
+        db.query(models.Todo).filter(
+            models.Todo.id.in_([todo.id for todo in batch])
+        ).delete(synchronize_session=False)
+        db.commit()
+        for todo in batch:
+            db.expunge(todo)
+
+        archived += len(batch)
+
+    return archived
+
+
+def run_maintenance(bind: Engine, archived: int):
+    """
+    Refreshes planner statistics after rows were moved, and reclaims the freed
+    space once enough rows have gone. Both need to run outside a transaction.
+    """
+    if not archived:
+        return
+
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if archived >= settings.ARCHIVE_VACUUM_MIN_ROWS:
+            connection.execute(text("VACUUM"))
+        connection.execute(text("ANALYZE"))
+
+
+def run_archival() -> int:
+    db = SessionLocal()
+    try:
+        archived = archive_completed_todos(db)
+    finally:
+        db.close()
+
+    run_maintenance(engine, archived)
+    logger.info("Archived %d completed todos", archived)
+    return archived
+
+
+def _run_periodically(interval_seconds: float, stop: threading.Event):
+    while not stop.wait(interval_seconds):
+        try:
+            run_archival()
+        except Exception:
+            logger.exception("Todo archival failed")
+
+
+def start_scheduler() -> threading.Event | None:
+    """
+    Starts the archival job on a daemon thread every ARCHIVE_INTERVAL_HOURS.
+    Returns the event that stops it, or None when the interval is 0.
+    """
+    if settings.ARCHIVE_INTERVAL_HOURS <= 0:
+        return None
+
+    stop = threading.Event()
+    threading.Thread(
+        target=_run_periodically,
+        args=(settings.ARCHIVE_INTERVAL_HOURS * 3600, stop),
+        daemon=True,
+    ).start()
+    return stop
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_archival()
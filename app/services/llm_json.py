@@ -0,0 +1,94 @@
+import json
+import re
+
+# Only fences that open and close at the start of a line, so a ``` inside a
+# JSON string value is never mistaken for one.
+_FENCE_RE = re.compile(r"^```(?:json|JSON)?[ \t]*\n(.*?)(?:^```|\Z)", re.DOTALL | re.MULTILINE)
+_SEPARATORS = " \t\r\n,"
+
+
+def _unwrap(value, key: str | None):
+    """
+    Accepts either a bare array or an object wrapping one, e.g. {"tasks": [...]}.
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        if key is not None and isinstance(value.get(key), list):
+            return value[key]
+        lists = [v for v in value.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return None
+
+
+def _salvage_array(text: str, start: int) -> list:
+    """
+    Decodes array elements one by one from text[start] == "[" and keeps every
+    element that is complete, so output cut off mid-stream still yields items.
+    """
+    decoder = json.JSONDecoder()
+    items = []
+    i = start + 1
+    while i < len(text):
+        while i < len(text) and text[i] in _SEPARATORS:
+            i += 1
+        if i >= len(text) or text[i] == "]":
+            break
+        try:
+            item, i = decoder.raw_decode(text, i)
+        except json.JSONDecodeError:
+            break
+        items.append(item)
+    return items
+
+
+def _decode(text: str, key: str | None):
+    """
+    Parses text that is, or starts with, a JSON value, ignoring prose around it.
+    Returns None when no array can be found that way.
+    """
+    try:
+        found = _unwrap(json.loads(text), key)
+        if found is not None:
+            return found
+    except json.JSONDecodeError:
+        pass
+
+    first = min((i for i in (text.find("["), text.find("{")) if i != -1), default=-1)
+    if first != -1:
+        try:
+            return _unwrap(json.JSONDecoder().raw_decode(text, first)[0], key)
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def extract_json_array(text: str, key: str | None = None) -> list:
+    """
+    Pulls a JSON array out of raw model output. Handles markdown fences, prose
+    before or after the JSON, an object wrapping the array under `key`, and
+    truncated output (complete elements are kept). Raises ValueError when no
+    array can be recovered.
+    """
+    text = (text or "").strip()
+    found = _decode(text, key)
+    if found is not None:
+        return found
+
+    fenced = _FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+        found = _decode(text, key)
+        if found is not None:
+            return found
+
+    array_start = text.find("[")
+    if key is not None and f'"{key}"' in text:
+        array_start = text.find("[", text.find(f'"{key}"'))
+    if array_start != -1:
+        items = _salvage_array(text, array_start)
+        if items:
+            return items
+
+    raise ValueError("No JSON array found in model output")
@@ -0,0 +1,151 @@
+import math
+import re
+from datetime import datetime
+
+import numpy as np
+
+from .. import models
+
+# Title words that push a todo up or down regardless of what kind of work it is.
+URGENT_KEYWORDS = {
+    "urgent", "asap", "today", "tonight", "now", "deadline", "due", "overdue",
+    "critical", "important", "pay", "bill", "submit", "renew", "fix",
+}
+LOW_KEYWORDS = {
+    "maybe", "someday", "optional", "later", "eventually", "idea", "consider", "wishlist",
+}
+
+# Verb classes follow the same flow the AI prompt asks for:
+# deep-focus work first, admin and errands after, recovery at the end.
+VERB_CLASSES = {
+    "deep": {
+        "write", "draft", "design", "build", "implement", "plan", "research", "analyze",
+        "analyse", "prepare", "study", "create", "develop", "solve", "outline", "code",
+        "learn", "practice", "finish", "complete",
+    },
+    "admin": {
+        "email", "call", "reply", "respond", "schedule", "book", "file", "organize",
+        "organise", "clean", "review", "update", "check", "send", "buy", "order",
+        "sort", "tidy", "print", "sign", "read",
+    },
+    "recovery": {
+        "walk", "relax", "stretch", "meditate", "rest", "break", "nap", "journal",
+        "exercise", "workout", "run", "yoga", "unwind",
+    },
+}
+VERB_CLASS_WEIGHTS = {"deep": 1.0, "admin": 0.4, "recovery": -0.6}
+
+W_PRIORITY = 3.0
+W_AGE = 1.0
+W_URGENT = 2.0
+W_LOW = 1.5
+W_COMPLETED = 100.0
+
+# In hybrid mode, todos scoring within this fraction of the list's score spread
+# of the first todo in a run are treated as a tie.
+TIE_EPSILON_RATIO = 0.005
+# Bounds on what hybrid mode sends to the LLM: todos per tie group and in total.
+MAX_TIE_GROUP = 8
+MAX_TIED_TODOS = 40
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _title_features(title: str) -> tuple[float, float, float]:
+    words = _WORD_RE.findall((title or "").lower())
+    word_set = set(words)
+    urgent = float(bool(word_set & URGENT_KEYWORDS))
+    low = float(bool(word_set & LOW_KEYWORDS))
+
+    verb_weight = 0.0
+    if words:
+        for verb_class, verbs in VERB_CLASSES.items():
+            if words[0] in verbs:
+                verb_weight = VERB_CLASS_WEIGHTS[verb_class]
+                break
+    return urgent, low, verb_weight
+
+
+def score(todos: list[models.Todo], now: datetime | None = None) -> np.ndarray:
+    """
+    Scores every todo in one pass; a higher score means it should come first.
+    """
+    if not todos:
+        return np.zeros(0)
+
+    now = now or datetime.utcnow()
+    n = len(todos)
+
+    priorities = np.array(
+        [todo.priority if todo.priority is not None else math.nan for todo in todos], dtype=float
+    )
+    ages = np.array(
+        [(now - todo.created_at).total_seconds() / 86400 if todo.created_at else 0.0 for todo in todos],
+        dtype=float,
+    )
+    completed = np.array([bool(todo.completed) for todo in todos], dtype=float)
+    title_features = np.array([_title_features(todo.title) for todo in todos], dtype=float).reshape(n, 3)
+    urgent, low, verb_weight = title_features.T
+
+    # Existing priority is a rank (1 = highest), so invert it into [0, 1].
+    # Todos without one land in the middle.
+    if np.all(np.isnan(priorities)):
+        priority_norm = np.full(n, 0.5)
+    else:
+        lo, hi = np.nanmin(priorities), np.nanmax(priorities)
+        span = hi - lo if hi > lo else 1.0
+        priority_norm = np.where(np.isnan(priorities), 0.5, 1.0 - (priorities - lo) / span)
+
+    ages = np.log1p(np.clip(ages, 0.0, None))
+    age_norm = ages / ages.max() if ages.max() > 0 else ages
+
+    return (
+        W_PRIORITY * priority_norm
+        + W_AGE * age_norm
+        + W_URGENT * urgent
+        - W_LOW * low
+        + verb_weight
+        - W_COMPLETED * completed
+    )
+
+
+def rank(todos: list[models.Todo], now: datetime | None = None) -> tuple[list[models.Todo], np.ndarray]:
+    """
+    Returns the todos ordered best-first along with their scores in that order.
+    Ties are broken by id so the result is deterministic.
+    """
+    scores = score(todos, now)
+    ids = np.array([todo.id or 0 for todo in todos])
+    order = np.lexsort((ids, -scores))
+    return [todos[i] for i in order], scores[order]
+
+
+def tie_groups(sorted_scores: np.ndarray) -> list[slice]:
+    """
+    Finds runs of todos whose scores are within the tie epsilon of the first
+    score in the run. Runs are capped at MAX_TIE_GROUP todos, and no more than
+    MAX_TIED_TODOS todos are returned in total, best-scored first. Only runs
+    with at least two todos are returned.
+    """
+    n = len(sorted_scores)
+    if n < 2:
+        return []
+
+    epsilon = TIE_EPSILON_RATIO * float(sorted_scores.max() - sorted_scores.min())
+    scores = sorted_scores.tolist()
+    groups = []
+    budget = MAX_TIED_TODOS
+    start = 0
+
+    for i in range(1, n + 1):
+        if i < n and i - start < MAX_TIE_GROUP and scores[start] - scores[i] <= epsilon:
+            continue
+        size = min(i - start, budget)
+        if size > 1:
+            groups.append(slice(start, start + size))
+            budget -= size
+            if budget < 2:
+                break
+        start = i
+
+    return groups
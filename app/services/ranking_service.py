@@ -0,0 +1,233 @@
+import bisect
+import hashlib
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from . import ai_service, priority_scorer
+
+# How many evenly spaced, already-ranked todos are sent along with brand-new
+# todos so the model has reference points to slot them in between.
+NEW_TASK_ANCHORS = 4
+
+
+def content_hash(todo: models.Todo) -> str:
+    """
+    Fingerprint of the fields the AI ranks on. Priority is left out on purpose,
+    otherwise every ranking we write back would invalidate itself.
+    """
+    raw = f"{todo.title or ''}\x1f{todo.description or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def rank_with_ai(todos: list[models.Todo],
+                 anchors: list[models.Todo] = ()) -> tuple[list[models.Todo], list[models.Todo]]:
+    """
+    Sends the given todos, plus anchors for reference, to the model. Returns
+    the todos it ranked in the order it chose, and separately those it did not
+    rank (e.g. dropped to fit the token budget) in their original order.
+    """
+    to_response = schemas.TodoResponse.model_validate
+    re_prioritized_tasks_data = ai_service.get_priority_tasks(
+        task_list=[to_response(todo) for todo in todos],
+        context_list=[to_response(todo) for todo in anchors],
+    )
+
+    if not re_prioritized_tasks_data:
+        raise HTTPException(status_code=400, detail="AI failed to re-prioritize tasks")
+
+    sent = list(todos) + list(anchors)
+    todo_map = {todo.id: todo for todo in sent}
+    ranked = []
+    for task in sorted(re_prioritized_tasks_data, key=lambda t: t.get("priority") or 0):
+        todo = todo_map.pop(task.get("id"), None)
+        if todo is not None:
+            ranked.append(todo)
+
+    return ranked, [todo for todo in sent if todo.id in todo_map]
+
+
+def _select_anchors(kept: list[models.Todo], previous_positions: dict[int, int],
+                    changed: list[models.Todo]) -> list[models.Todo]:
+    """
+    Picks the unchanged todos sent alongside the changed ones: the old neighbours
+    of each modified todo, plus a few evenly spaced ones when there are new todos.
+    """
+    if not kept:
+        return []
+
+    kept_positions = [previous_positions[todo.id] for todo in kept]
+    anchor_indexes = set()
+    has_new = False
+
+    for todo in changed:
+        old_position = previous_positions.get(todo.id)
+        if old_position is None:
+            has_new = True
+            continue
+        i = bisect.bisect_left(kept_positions, old_position)
+        if i > 0:
+            anchor_indexes.add(i - 1)
+        if i < len(kept):
+            anchor_indexes.add(i)
+
+    if has_new:
+        step = max(1, len(kept) // NEW_TASK_ANCHORS)
+        anchor_indexes.update(range(0, len(kept), step))
+
+    return [kept[i] for i in sorted(anchor_indexes)]
+
+
+def _merge(kept: list[models.Todo], ai_order: list[models.Todo]) -> list[models.Todo]:
+    """
+    Inserts every non-anchor todo right after the anchor the model placed before
+    it, or right before the first anchor if the model ranked it above all of
+    them. The existing order of the unchanged todos is never touched.
+    """
+    kept_ids = {todo.id for todo in kept}
+    inserts: dict[int | None, list[models.Todo]] = {}
+    first_anchor = None
+    last_anchor = None
+
+    for todo in ai_order:
+        if todo.id in kept_ids:
+            first_anchor = first_anchor if first_anchor is not None else todo.id
+            last_anchor = todo.id
+        else:
+            inserts.setdefault(last_anchor, []).append(todo)
+
+    if first_anchor is None:
+        return inserts.get(None, []) + kept
+
+    merged = []
+    for todo in kept:
+        if todo.id == first_anchor:
+            merged.extend(inserts.get(None, []))
+        merged.append(todo)
+        merged.extend(inserts.get(todo.id, []))
+    return merged
+
+
+def _place_moved(ordered: list[models.Todo], moved: list[models.Todo]) -> list[models.Todo]:
+    """
+    Puts todos the user re-prioritized by hand back at the priority they chose.
+    """
+    placed = list(ordered)
+    for todo in sorted(moved, key=lambda todo: todo.priority or 0):
+        placed.insert(max(0, (todo.priority or 1) - 1), todo)
+    return placed
+
+
+def _save_ranking(db: Session, owner_id: int, ordered: list[models.Todo], hashes: dict[int, str]):
+    """
+    Replaces the stored ranking. Todos without a hash get no row.
+    """
+    db.query(models.TodoRanking).filter(models.TodoRanking.owner_id == owner_id).delete()
+    db.add_all([
+        models.TodoRanking(owner_id=owner_id, todo_id=todo.id, position=position,
+                           content_hash=hashes[todo.id])
+        for position, todo in enumerate(ordered)
+        if todo.id in hashes
+    ])
+
+
+def _apply_order(db: Session, user: models.User, ordered: list[models.Todo],
+                 hashes: dict[int, str]) -> list[models.Todo]:
+    """
+    Gives the active todos priorities 1..n in `ordered` and numbers completed
+    todos after them, so ranks stay unique. Saves the ranking and commits.
+    Returns all of the user's todos, active first.
+    """
+    completed = (
+        db.query(models.Todo)
+        .filter(models.Todo.owner_id == user.id, models.Todo.completed.is_(True))
+        .order_by(models.Todo.priority, models.Todo.id)
+        .all()
+    )
+    for position, todo in enumerate(ordered + completed, start=1):
+        todo.priority = position
+
+    _save_ranking(db, user.id, ordered, hashes)
+    db.commit()
+
+    return ordered + completed
+
+
+def _active_todos(db: Session, user: models.User) -> list[models.Todo]:
+    return (
+        db.query(models.Todo)
+        .filter(models.Todo.owner_id == user.id, models.Todo.completed.is_not(True))
+        .all()
+    )
+
+
+def re_prioritize_local(db: Session, user: models.User, hybrid: bool = False) -> list[models.Todo]:
+    """
+    Re-ranks the user's active todos with the local scorer. In hybrid mode the
+    todos the scorer cannot tell apart are sent to the model in a single call
+    and reordered within their tie group. The result is saved as the stored
+    ranking so a later incremental run builds on it. Returns all of the user's
+    todos, active ones in their new order followed by completed ones.
+    """
+    active = _active_todos(db, user)
+    ordered, scores = priority_scorer.rank(active)
+
+    if hybrid:
+        groups = priority_scorer.tie_groups(scores)
+        tied = [todo for group in groups for todo in ordered[group]]
+        if tied:
+            ranked, unranked = rank_with_ai(tied)
+            ai_position = {todo.id: i for i, todo in enumerate(ranked + unranked)}
+            for group in groups:
+                ordered[group] = sorted(ordered[group], key=lambda todo: ai_position[todo.id])
+
+    return _apply_order(db, user, ordered, {todo.id: content_hash(todo) for todo in active})
+
+
+def re_prioritize(db: Session, user: models.User) -> list[models.Todo]:
+    """
+    Re-ranks the user's active todos incrementally. Only todos that are new or
+    whose content changed since the last ranking (plus a few neighbours for
+    context) go to the model; completed todos are never sent and are numbered
+    after the active ones. Todos whose priority the user changed by hand keep
+    that priority. Returns all of the user's todos, active ones first.
+    """
+    active = _active_todos(db, user)
+    previous = (
+        db.query(models.TodoRanking)
+        .filter(models.TodoRanking.owner_id == user.id)
+        .order_by(models.TodoRanking.position)
+        .all()
+    )
+
+    hashes = {todo.id: content_hash(todo) for todo in active}
+    previous_positions = {row.todo_id: row.position for row in previous}
+    previous_hashes = {row.todo_id: row.content_hash for row in previous}
+
+    unchanged = sorted(
+        (todo for todo in active if previous_hashes.get(todo.id) == hashes[todo.id]),
+        key=lambda todo: previous_positions[todo.id],
+    )
+    # Every ranking writes priority = position + 1, so a different priority
+    # means the user moved the todo by hand; keep it where they put it.
+    moved = [todo for todo in unchanged if todo.priority != previous_positions[todo.id] + 1]
+    moved_ids = {todo.id for todo in moved}
+    kept = [todo for todo in unchanged if todo.id not in moved_ids]
+    kept_ids = {todo.id for todo in kept}
+    changed = [todo for todo in active if todo.id not in kept_ids and todo.id not in moved_ids]
+
+    if changed:
+        ranked, unranked = rank_with_ai(changed, _select_anchors(kept, previous_positions, changed))
+        # Todos the model did not rank go last and get no ranking row, so the
+        # next run sees them as changed and sends them again.
+        unranked = [todo for todo in unranked if todo.id not in kept_ids]
+        for todo in unranked:
+            del hashes[todo.id]
+        ordered = _merge(kept, ranked) + unranked
+    else:
+        ordered = kept
+
+    ordered = _place_moved(ordered, moved)
+
+    return _apply_order(db, user, ordered, hashes)
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+from datetime import datetime
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Optional tokenizer for the pinned `tokenizers` package: a local tokenizer.json
+# path, or a Hugging Face repo with one. Only used when tiktoken can't load.
+TOKENIZER_NAME = os.getenv("AI_TOKENIZER")
+
+# Compaction steps tried in order until the tasks fit the budget.
+DESCRIPTION_LIMITS = (160, 60, 0)
+TITLE_LIMIT = 60
+
+
+@lru_cache(maxsize=1)
+def load_tokenizer():
+    """
+    Returns a function mapping text to its token count. Prefers tiktoken, then
+    the `tokenizers` package when AI_TOKENIZER is set, and falls back to the
+    usual ~4 characters per token estimate. Loading may download encoding files
+    on first use, so call this at startup rather than from a request.
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        logger.warning("Could not load tiktoken encoding", exc_info=True)
+
+    if TOKENIZER_NAME:
+        try:
+            from tokenizers import Tokenizer
+            if os.path.isfile(TOKENIZER_NAME):
+                tokenizer = Tokenizer.from_file(TOKENIZER_NAME)
+            else:
+                tokenizer = Tokenizer.from_pretrained(TOKENIZER_NAME)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+        except Exception:
+            logger.warning("Could not load tokenizer %s", TOKENIZER_NAME, exc_info=True)
+
+    logger.warning("No tokenizer available, estimating token counts from length")
+    return lambda text: (len(text) + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    return load_tokenizer()(text or "")
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    tokens = count_tokens(text)
+    while tokens > max_tokens and text:
+        text = text[:max(0, len(text) * max_tokens // tokens - 1)]
+        tokens = count_tokens(text)
+    return text
+
+
+def _age_days(created_at, now: datetime) -> int:
+    if not created_at:
+        return 0
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return max(0, (now - created_at.replace(tzinfo=None)).days)
+
+
+def encode_task(task: dict, now: datetime, description_limit: int, title_limit: int | None = None) -> dict:
+    """
+    Short-key form of a todo for prompts: i=id, t=title, d=description,
+    p=current priority, a=age in days, c=completed (only sent when true).
+    """
+    encoded = {"i": task["id"], "t": (task.get("title") or "")[:title_limit]}
+    description = (task.get("description") or "")[:description_limit]
+    if description:
+        encoded["d"] = description
+    if task.get("priority") is not None:
+        encoded["p"] = task["priority"]
+    encoded["a"] = _age_days(task.get("created_at"), now)
+    if task.get("completed"):
+        encoded["c"] = 1
+    return encoded
+
+
+def _dumps(tasks: list[dict]) -> str:
+    return json.dumps(tasks, ensure_ascii=False, separators=(",", ":"))
+
+
+def fit_tasks(tasks: list[dict], budget: int, context: list[dict] = ()) -> tuple[str, list[dict]]:
+    """
+    Encodes `tasks` followed by `context` (reference tasks the caller can do
+    without) compactly, and degrades until the payload fits `budget` tokens:
+    shorter descriptions, then no descriptions, then shorter titles, then
+    dropping context tasks, then dropping tasks from the end of the list.
+    Returns the payload and the tasks it contains; dropped tasks are left for
+    the caller to handle.
+    """
+    now = datetime.utcnow()
+    everything = list(tasks) + list(context)
+    payload = "[]"
+
+    for title_limit in (None, TITLE_LIMIT):
+        for description_limit in DESCRIPTION_LIMITS:
+            payload = _dumps([encode_task(task, now, description_limit, title_limit) for task in everything])
+            if count_tokens(payload) <= budget:
+                return payload, everything
+
+    def encode(selected):
+        return _dumps([encode_task(task, now, 0, TITLE_LIMIT) for task in selected])
+
+    kept_context = list(context)
+    while kept_context and count_tokens(payload) > budget:
+        kept_context.pop()
+        payload = encode(list(tasks) + kept_context)
+
+    kept = list(tasks)
+    while kept and count_tokens(payload) > budget:
+        # Shrink proportionally instead of one task at a time; long lists are the common case.
+        keep = max(0, min(len(kept) - 1, len(kept) * budget // count_tokens(payload)))
+        kept = kept[:keep]
+        payload = encode(kept)
+
+    included = kept + kept_context
+    logger.warning("Token budget %d exceeded, dropped %d of %d tasks",
+                   budget, len(everything) - len(included), len(everything))
+    return payload, included
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas import ai_schema
+from app.services import ai_service
+
+
+class FakeCompletions:
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content, finish_reason = self.replies.pop(0)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage=None)
+
+
+def _use_fake(monkeypatch, *replies):
+    completions = FakeCompletions(*replies)
+    monkeypatch.setattr(ai_service, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
+
+
+def _complete(min_items):
+    return ai_service._complete_json(
+        label="test",
+        messages=[{"role": "user", "content": "rank"}],
+        temperature=0,
+        response_format=ai_service.TASK_PRIORITIES_RESPONSE_FORMAT,
+        key="tasks",
+        adapter=ai_schema.task_priority_list_adapter,
+        min_items=min_items,
+    )
+
+
+def test_cut_off_output_goes_through_repair(monkeypatch):
+    completions = _use_fake(
+        monkeypatch,
+        ('{"tasks": [{"id": 1, "priority": 1}, {"id": 2, "pri', "length"),
+        ('{"tasks": [{"id": 1, "priority": 1}, {"id": 2, "priority": 2}]}', "stop"),
+    )
+
+    items = _complete(min_items=2)
+
+    assert [item.id for item in items] == [1, 2]
+    assert len(completions.calls) == 2
+
+
+def test_too_few_items_goes_through_repair(monkeypatch):
+    completions = _use_fake(
+        monkeypatch,
+        ('{"tasks": [{"id": 1, "priority": 1}]}', "stop"),
+        ('{"tasks": [{"id": 2, "priority": 1}, {"id": 1, "priority": 2}]}', "stop"),
+    )
+
+    items = _complete(min_items=2)
+
+    assert [item.id for item in items] == [2, 1]
+    assert "expected at least 2 items" in completions.calls[1]["messages"][-1]["content"]
+
+
+def test_short_output_after_repair_returns_valid_items(monkeypatch):
+    completions = _use_fake(
+        monkeypatch,
+        ('{"tasks": [{"id": 1, "priority": 1}, {"id": 2, "priority": 2}]}', "stop"),
+        ('{"tasks": [{"id": 2, "priority": 1}, {"id": 1, "priority": 2}]}', "stop"),
+    )
+
+    items = _complete(min_items=3)
+
+    assert [item.id for item in items] == [2, 1]
+    assert len(completions.calls) == 2
+
+
+def test_unparseable_output_after_repair_still_raises(monkeypatch):
+    _use_fake(monkeypatch, ("no json here", "stop"), ("still none", "stop"))
+
+    with pytest.raises(ValueError):
+        _complete(min_items=1)
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from app import models
+from app.api import todos
+from app.services import archive_service
+
+
+def _add_user(db):
+    user = models.User(email="user@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _add_todo(db, user, title, age_days, completed):
+    todo = models.Todo(title=title, description="", priority=1, completed=completed,
+                       created_at=datetime.utcnow() - timedelta(days=age_days), owner_id=user.id)
+    db.add(todo)
+    db.commit()
+    return todo
+
+
+def test_archives_only_old_completed_todos_in_batches(db):
+    user = _add_user(db)
+    old_done = [_add_todo(db, user, f"old done {i}", 40, True).id for i in range(5)]
+    _add_todo(db, user, "old open", 40, False)
+    _add_todo(db, user, "new done", 1, True)
+
+    archived = archive_service.archive_completed_todos(db, older_than_days=30, batch_size=2)
+
+    assert archived == 5
+    assert sorted(row.todo_id for row in db.query(models.ArchivedTodo)) == old_done
+    assert sorted(todo.title for todo in db.query(models.Todo)) == ["new done", "old open"]
+    assert db.query(models.Todo).filter(models.Todo.id.in_(old_done)).count() == 0
+
+
+def test_archiving_nothing_is_a_no_op(db):
+    user = _add_user(db)
+    _add_todo(db, user, "open", 90, False)
+
+    assert archive_service.archive_completed_todos(db, older_than_days=30, batch_size=2) == 0
+    assert db.query(models.Todo).count() == 1
+
+
+def test_include_archived_returns_archived_todos_as_completed(db):
+    user = _add_user(db)
+    archived_id = _add_todo(db, user, "old done", 40, True).id
+    _add_todo(db, user, "open", 1, False)
+    archive_service.archive_completed_todos(db, older_than_days=30)
+
+    without = todos.get_all_todos(include_archived=False, db=db, current_user=user)
+    with_archived = todos.get_all_todos(include_archived=True, db=db, current_user=user)
+
+    assert [todo.title for todo in without] == ["open"]
+    archived = [todo for todo in with_archived if todo.title == "old done"]
+    assert len(with_archived) == 2
+    assert archived[0].id == archived_id
+    assert archived[0].completed is True
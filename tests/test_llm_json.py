@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.llm_json import extract_json_array
+
+
+def test_plain_array():
+    assert extract_json_array('[{"a": 1}]') == [{"a": 1}]
+
+
+def test_wrapped_array_under_key():
+    assert extract_json_array('{"tasks": [{"id": 1}]}', "tasks") == [{"id": 1}]
+
+
+def test_backticks_inside_string_values_are_not_fences():
+    text = '{"subtasks": [{"title": "Document setup", "description": "Add a ```bash``` install snippet"}]}'
+
+    assert extract_json_array(text, "subtasks") == [
+        {"title": "Document setup", "description": "Add a ```bash``` install snippet"}
+    ]
+
+
+def test_fenced_output_with_prose():
+    text = 'Sure!\n```json\n[{"a": 1}, {"a": 2}]\n```\nHope this helps'
+
+    assert extract_json_array(text) == [{"a": 1}, {"a": 2}]
+
+
+def test_truncated_output_keeps_complete_items():
+    text = '```json\n{"subtasks": [{"a": 1}, {"a": 2}, {"a":'
+
+    assert extract_json_array(text, "subtasks") == [{"a": 1}, {"a": 2}]
+
+
+def test_no_array_raises():
+    with pytest.raises(ValueError):
+        extract_json_array("nothing to see here")
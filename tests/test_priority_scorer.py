@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import priority_scorer
+
+
+def _todo(id, title, priority, age_days=0, completed=False):
+    return SimpleNamespace(id=id, title=title, priority=priority, completed=completed,
+                           created_at=datetime(2026, 1, 1) - timedelta(days=age_days))
+
+
+def test_rank_orders_by_score_and_puts_completed_last():
+    todos = [
+        _todo(1, "Walk the dog", 2),
+        _todo(2, "Write report urgent", 2),
+        _todo(3, "Email Bob", 1, completed=True),
+    ]
+
+    ordered, scores = priority_scorer.rank(todos, now=datetime(2026, 1, 1))
+
+    assert [todo.id for todo in ordered] == [2, 1, 3]
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_tie_groups_do_not_chain_across_long_lists():
+    todos = [_todo(i, f"Email person {i}", i + 1, age_days=i % 30) for i in range(2000)]
+
+    _, scores = priority_scorer.rank(todos, now=datetime(2026, 1, 1))
+    groups = priority_scorer.tie_groups(scores)
+
+    sizes = [group.stop - group.start for group in groups]
+    assert all(2 <= size <= priority_scorer.MAX_TIE_GROUP for size in sizes)
+    assert sum(sizes) <= priority_scorer.MAX_TIED_TODOS
+
+
+def test_tie_groups_groups_equal_scores():
+    groups = priority_scorer.tie_groups(np.array([5.0, 3.0, 3.0, 3.0, 1.0]))
+
+    assert groups == [slice(1, 4)]
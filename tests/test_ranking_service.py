@@ -0,0 +1,109 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app import models
+from app.services import ranking_service
+
+
+def _todos(*ids):
+    return [SimpleNamespace(id=i) for i in ids]
+
+
+def _ids(todos):
+    return [todo.id for todo in todos]
+
+
+def test_merge_places_todo_ranked_above_first_anchor_just_before_it():
+    kept = _todos(0, 1, 2, 3, 4, 6, 7, 8, 9)
+    by_id = {todo.id: todo for todo in kept}
+    edited = SimpleNamespace(id=5)
+
+    merged = ranking_service._merge(kept, [edited, by_id[4], by_id[6]])
+
+    assert _ids(merged) == [0, 1, 2, 3, 5, 4, 6, 7, 8, 9]
+
+
+def test_merge_inserts_after_preceding_anchor():
+    kept = _todos(0, 1, 2, 3)
+    by_id = {todo.id: todo for todo in kept}
+
+    merged = ranking_service._merge(kept, [by_id[1], SimpleNamespace(id=7), by_id[2]])
+
+    assert _ids(merged) == [0, 1, 7, 2, 3]
+
+
+def test_merge_without_anchors_puts_changed_first():
+    merged = ranking_service._merge(_todos(1, 2), _todos(8, 9))
+
+    assert _ids(merged) == [8, 9, 1, 2]
+
+
+def test_select_anchors_uses_old_neighbours_of_edited_todo():
+    kept = _todos(0, 1, 2, 3, 4, 6, 7, 8, 9)
+    previous_positions = {i: i for i in range(10)}
+
+    anchors = ranking_service._select_anchors(kept, previous_positions, _todos(5))
+
+    assert _ids(anchors) == [4, 6]
+
+
+def test_select_anchors_spreads_anchors_for_new_todos():
+    kept = _todos(*range(8))
+    previous_positions = {i: i for i in range(8)}
+
+    anchors = ranking_service._select_anchors(kept, previous_positions, _todos(100))
+
+    assert _ids(anchors) == [0, 2, 4, 6]
+
+
+def test_place_moved_keeps_priority_set_by_user():
+    moved = [SimpleNamespace(id=9, priority=1), SimpleNamespace(id=8, priority=3)]
+
+    placed = ranking_service._place_moved(_todos(1, 2, 3), moved)
+
+    assert _ids(placed) == [9, 1, 8, 2, 3]
+
+
+def test_rank_with_ai_reports_todos_the_model_did_not_rank(monkeypatch):
+    def fake_get_priority_tasks(task_list, context_list):
+        assert [task.id for task in context_list] == [3]
+        return [{"id": 3, "priority": 1}, {"id": 1, "priority": 2}]
+
+    monkeypatch.setattr(ranking_service.ai_service, "get_priority_tasks", fake_get_priority_tasks)
+    monkeypatch.setattr(ranking_service.schemas.TodoResponse, "model_validate", lambda todo: todo)
+
+    ranked, unranked = ranking_service.rank_with_ai(_todos(1, 2), _todos(3))
+
+    assert _ids(ranked) == [3, 1]
+    assert _ids(unranked) == [2]
+
+
+def _seed_user(db, todos):
+    user = models.User(email="user@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    for title, priority, completed in todos:
+        db.add(models.Todo(title=title, description="", priority=priority, completed=completed,
+                           created_at=datetime(2026, 1, 1), owner_id=user.id))
+    db.commit()
+    return user
+
+
+def test_re_prioritize_local_numbers_completed_todos_after_active(db):
+    user = _seed_user(db, [("Done", 1, True), ("Write report", 1, False), ("Walk", 2, False)])
+
+    result = ranking_service.re_prioritize_local(db, user)
+
+    assert [todo.title for todo in result] == ["Write report", "Walk", "Done"]
+    assert [todo.priority for todo in result] == [1, 2, 3]
+
+
+def test_re_prioritize_returns_unique_ranks_with_completed_last(db, monkeypatch):
+    user = _seed_user(db, [("Done", 1, True), ("A", 1, False), ("B", 2, False)])
+    monkeypatch.setattr(ranking_service, "rank_with_ai",
+                        lambda todos, anchors=(): (sorted(todos, key=lambda t: t.title, reverse=True), []))
+
+    result = ranking_service.re_prioritize(db, user)
+
+    assert [todo.title for todo in result] == ["B", "A", "Done"]
+    assert [todo.priority for todo in result] == [1, 2, 3]
@@ -0,0 +1,32 @@
+from app.services import token_budget
+
+
+def _task(id, title="Task", description=""):
+    return {"id": id, "title": title, "description": description, "priority": id,
+            "created_at": "2026-01-01T00:00:00", "completed": False, "owner_id": 1}
+
+
+def _ids(payload_tasks):
+    return [task["id"] for task in payload_tasks]
+
+
+def test_fit_tasks_keeps_everything_within_budget(monkeypatch):
+    monkeypatch.setattr(token_budget, "count_tokens", len)
+
+    payload, included = token_budget.fit_tasks([_task(1)], 1000, context=[_task(2)])
+
+    assert _ids(included) == [1, 2]
+    assert '"owner_id"' not in payload
+
+
+def test_fit_tasks_drops_context_before_tasks(monkeypatch):
+    monkeypatch.setattr(token_budget, "count_tokens", len)
+    tasks = [_task(i) for i in range(1, 4)]
+    context = [_task(i) for i in range(10, 14)]
+    budget = len(token_budget._dumps([token_budget.encode_task(t, token_budget.datetime.utcnow(), 0)
+                                      for t in tasks + context[:1]]))
+
+    payload, included = token_budget.fit_tasks(tasks, budget, context=context)
+
+    assert _ids(included) == [1, 2, 3, 10]
+    assert len(payload) <= budget